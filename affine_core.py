@@ -0,0 +1,104 @@
+from math import gcd
+
+# Change to true for verbosity
+DEBUG = False
+MAX_BYTES = 0xFF
+# bytes of ciphertext decrypted at a time
+CHUNK_SIZE = 0x100000
+# bytes of JPEG's start of image (FF D8), needed to find the key
+SOI_SIZE = 2
+# bytes of JPEG header checked when the ciphertext has them
+HEADER_SIZE = 4
+# marker bytes that may follow FF after JPEG's start of image: C0 to FE
+# except RST0-7, SOI and EOI (D0 to D9), or FF as a fill byte
+JPEG_NEXT_MARKERS = frozenset(marker for marker in range(0xC0, 0x100) if not 0xD0 <= marker <= 0xD9)
+
+# m^-1 candidates that are relatively prime to MAX_BYTES + 1, and their
+# inverses (m), computed once as MAX_BYTES never changes
+COPRIME_KEYS = tuple(i for i in range(1, MAX_BYTES + 1) if gcd(i, MAX_BYTES + 1) == 1)
+KEY_INVERSES = {i: pow(i, -1, MAX_BYTES + 1) for i in COPRIME_KEYS}
+
+class AffineException(Exception):
+    def __init__(self, str, code=0):
+        self.code = code
+        super().__init__(str)
+
+def debug_msg(*args, **kwargs):
+    if DEBUG: print(*args, **kwargs)
+
+def m_inverse_affine(m, n):
+    """
+    (m, n) = d
+
+    In affine, m as one of the encryption key must be relatively prime to
+    n, while n stands for maximum value. Because of this, the d value become
+    1:
+        (m, n) = 1
+
+    Then we need to find a combination that fulfills:
+        mx + ny = 1
+
+    x is the modular inverse of m. Python's pow(m, -1, n) finds it with
+    the extended euclidean algorithm, and gives x already in positive
+    value (0 to n - 1), as in affine, character (if using character)
+    position is indexed in positive value (e.g. 1 is a).
+    """
+
+    if n <= m:
+        raise AffineException(f'm must be smaller than n. (m={m}, n={n})', 4)
+
+    if gcd(m, n) != 1:
+        raise AffineException('m and n is not relatively prime to each other.', 3)
+
+    m_inverse = pow(m, -1, n)
+
+    if DEBUG: debug_msg(f'm_inverse_affine({m}, {n}) =', m_inverse)
+    return m_inverse
+
+def decrypt_affine(m, n, b, C, is_m_inverse=False):
+    # P = m^-1 . (C - b) (mod n)
+
+    if is_m_inverse:
+        # if given m is supposedly the inverse of the actual m value
+        return (m * (C - b)) % n
+
+    return (m_inverse_affine(m, n) * (C - b)) % n
+
+def is_jpeg_header(header, m_inverse, b):
+    """
+    Check if header, the first bytes of a ciphertext, decrypts with m^-1
+    and b to JPEG's start of image. Based on this website:
+        https://www.garykessler.net/library/file_sigs.html
+    JPEG's first two bytes are:
+        FF D8
+    and must be in header. If header is long enough to have them, the
+    next two bytes must also decrypt to FF and one of JPEG_NEXT_MARKERS,
+    which rules out ciphertexts that are not JPEG at all.
+
+    (mod n) is done with & MAX_BYTES, as n is MAX_BYTES + 1 (a power
+    of two).
+    """
+
+    if (m_inverse * (header[0] - b)) & MAX_BYTES != 0xFF or (m_inverse * (header[1] - b)) & MAX_BYTES != 0xD8:
+        return False
+
+    if len(header) > 2 and (m_inverse * (header[2] - b)) & MAX_BYTES != 0xFF:
+        return False
+
+    if len(header) > 3 and (m_inverse * (header[3] - b)) & MAX_BYTES not in JPEG_NEXT_MARKERS:
+        return False
+
+    return True
+
+def decrypt_file(file_ciphertext, plaintext_decrypted_name, m_inverse, b):
+    # every byte can only decrypt to one of MAX_BYTES + 1 values, so
+    # decrypt each possible byte once and translate the file with it
+    decryption_table = bytes(
+        decrypt_affine(m_inverse, MAX_BYTES + 1, b, C, is_m_inverse=True) for C in range(MAX_BYTES + 1)
+    )
+
+    # decrypt the file in chunks, so the whole ciphertext never has to
+    # be held in memory
+    with open(file_ciphertext, 'rb') as f_in, open(plaintext_decrypted_name, 'wb') as f_out:
+        for chunk in iter(lambda: f_in.read(CHUNK_SIZE), b''):
+            f_out.write(chunk.translate(decryption_table))
@@ -1,59 +1,61 @@
 import time
 
-# Change to true for verbosity
-DEBUG = False
-MAX_BYTES = 0xFF
+from affine_core import DEBUG, MAX_BYTES, HEADER_SIZE, SOI_SIZE, COPRIME_KEYS, KEY_INVERSES, debug_msg, decrypt_file, is_jpeg_header
 
-class AffineException(Exception):
-    def __init__(self, str, code=0, dump=None):
-        self.code = code
-        self.dump = dump
-        super().__init__(str)
-
-def debug_msg(*args, **kwargs):
-    if DEBUG: print(*args, **kwargs)
-
-def decrypt_affine(m_inverse, n, b, C):
-    # P = m^-1 . (C - b) (mod n)
-    return (m_inverse * (C - b)) % n
-
-def brute_force(ciphertext):
+def brute_force(header):
     """
     Brute force will attempt to give every possible number
     from 0 to MAX_BYTES based on affine decryption equation
-    for m^-1 and b.
+    for m^-1, of which only those relatively prime to n can
+    decrypt to JPEG's FF, then solve b for each of them (see below).
 
     P = m^-1 . (C - b) (mod n)
 
     How do we know the brute force is succesful? Because given
-    ciphertext is known to be in JPEG format, the file's header,
-    where for JPEG is the first two bytes, are used to determine
+    header is read from a ciphertext known to be in JPEG format, the
+    file's header, where for JPEG is the first two bytes, are used to determine
     if brute force is successful. Based on this website:
         https://www.garykessler.net/library/file_sigs.html
     JPEG's first two bytes are:
         FF D8
+    Those two bytes alone fix the key, if there is one. When header has
+    more bytes (up to HEADER_SIZE), is_jpeg_header also checks that they
+    decrypt to the marker that follows, so a ciphertext that is not JPEG
+    is not decrypted with a key that only fits FF D8.
+
+    Rather than guessing b, for each m^-1 the b that decrypts the first
+    header byte to FF is solved directly:
+        m^-1 . (C - b) ≡ FF (mod n)
+        b ≡ C - FF . m (mod n)
+    so only the rest of the header is left to check.
     """
 
-    header = ciphertext[:2]
+    if len(header) < SOI_SIZE:
+        if DEBUG: debug_msg(f"Affine brute force failed: header is shorter than {SOI_SIZE} bytes.", 1)
+        return None, None
 
-    for i in range(1, MAX_BYTES + 1):
-        for j in range(MAX_BYTES + 1):
-            # here i is m^-1 and j is b
-            if DEBUG: debug_msg(f"Affine brute force ({(i - 1) * MAX_BYTES + j}/{MAX_BYTES * (MAX_BYTES)})", 3)
-            if decrypt_affine(i, MAX_BYTES + 1, j, header[0]) == 0xFF and decrypt_affine(i, MAX_BYTES + 1, j, header[1]) == 0xD8:
-                return i, j
+    # here i is m^-1. FF is odd and n is a power of two, so (i, n) only
+    # divides FF when it is 1: no other m^-1 can decrypt a byte to FF.
+    for i in COPRIME_KEYS:
+        # m = i^-1, and j is b. (mod n) is done with & MAX_BYTES, as n is
+        # MAX_BYTES + 1 (a power of two).
+        j = (header[0] - 0xFF * KEY_INVERSES[i]) & MAX_BYTES
+        if DEBUG: debug_msg(f"Affine brute force ({i}/{MAX_BYTES}): b={j}", 3)
+        if is_jpeg_header(header, i, j):
+            return i, j
 
     return None, None
 
 
 def decrypt(file_ciphertext, plaintext_decrypted_name='decrypted'):
+    # only the JPEG header is needed to find the key
     with open(file_ciphertext, 'rb') as f:
-        ciphertext = f.read()
+        header = f.read(HEADER_SIZE)
 
     # time the attempt
     # time.time() and time.time_ns() delta sometimes results in 0 because it's too fast
     start_attempt = time.perf_counter_ns()
-    m_inverse, b = brute_force(ciphertext)
+    m_inverse, b = brute_force(header)
     duration_attempt = time.perf_counter_ns() - start_attempt
 
     print(f'Affine decryption with brute force took {duration_attempt / 1000000000}s')
@@ -64,16 +66,6 @@ def decrypt(file_ciphertext, plaintext_decrypted_name='decrypted'):
 
     if DEBUG: debug_msg(f"Affine brute force success: m^-1={m_inverse}, b={b}", 2)
 
-    plaintext = bytearray()
-    for i in range(len(ciphertext)):
-        plaintext += bytearray([decrypt_affine(
-            m_inverse,
-            MAX_BYTES + 1,
-            b,
-            ciphertext[i]
-        )])
-
-    with open(plaintext_decrypted_name, 'wb') as f:
-        f.write(plaintext)
+    decrypt_file(file_ciphertext, plaintext_decrypted_name, m_inverse, b)
 
 decrypt('affinecipher.jpeg', 'dec_brute.jpeg')
\ No newline at end of file
@@ -1,171 +1,12 @@
-import random
 import time
+from math import gcd
 
-# Change to true for verbosity
-DEBUG = False
-MAX_BYTES = 0xFF
-
-class AffineException(Exception):
-    def __init__(self, str, code=0, dump=None):
-        self.code = code
-        self.dump = dump
-        super().__init__(str)
-
-def debug_msg(*args, **kwargs):
-    if DEBUG: print(*args, **kwargs)
-
-def modulo_formula(p, q):
-    """
-    q = kp + r
-    """
-
-    if type(p) != int or type(q) != int:
-        raise AffineException("Either p or q must be integers.", 1)
-
-    # p must be less or equal to q so that the formula works
-    if p > q: return modulo_formula(q, p)
-
-    return {
-        'p': p,
-        'q': q,
-        'k': q // p,
-        'r': q % p
-    }
-
-def fill_gcd_affine(m, n):
-    if n <= m:
-        raise AffineException('m must be smaller than n.', 2)
-
-    gcd_affine = []
-
-    gcd_affine.append(modulo_formula(m, n))
-    if DEBUG: debug_msg(f'fill_gcd_affine({m}, {n}):', gcd_affine[-1])
-
-    while gcd_affine[-1]['r'] != 0:
-        gcd_affine.append(
-            modulo_formula(gcd_affine[-1]['r'], gcd_affine[-1]['p'])
-        )
-
-        if DEBUG: debug_msg(
-            f'fill_gcd_affine({gcd_affine[-2]["r"]}, {gcd_affine[-2]["p"]}):', gcd_affine[-1]
-        )
-
-    if gcd_affine[-2]['r'] != 1:
-        raise AffineException('m and n is not relatively prime to each other.', 3, gcd_affine)
-
-    return gcd_affine
-
-def m_inverse_affine(m, n):
-    """
-    (m, n) = d
-
-    In affine, m as one of the encryption key must be relatively prime to
-    n, while n stands for maximum value. Because of this, the d value become
-    1:
-        (m, n) = 1
-
-    Then we need to find a combination that fulfills:
-        mx + ny = 1
-    
-    We can find that combination by doing gcd until the r on the modulo
-    formula is 1, then backtracks to substitute subsequent p and q on the
-    combination formula to find what combination of m and n fulfills r = 1.
-        q = kp + r
-        q - kp = r
-        q - kp = 1 (because they do be relatively prime to each other)
-
-        1 = q - kp
-    """
-
-    if n <= m:
-        raise AffineException(f'm must be smaller than n. (m={m}, n={n})', 4)
-
-    # python list
-    gcd_modulo_formulas = fill_gcd_affine(m, n)
-
-    # initialize bezout's identity used for mx + ny = 1
-    affine_bezout_identity = None
-
-    """
-    backtrack the gcd modulo formula from r = 1 until p and q on
-    gcd_modulo_formulas equals to m and n.
-    """
-    while len(gcd_modulo_formulas) > 0:
-        gcd_modulo_formula = gcd_modulo_formulas.pop()
-        if gcd_modulo_formula['r'] == 0: continue
-
-        """
-        Because of
-            q = kp + 1, 1 = q - kp
-        backtracking to previous gcd iteration requires k to be
-        multiplied by -1.
-        """
-        gcd_modulo_formula['k'] *= -1
-
-        if affine_bezout_identity == None:
-            """
-            q = kp + 1, 1 = q - kp
-
-            -k need to be stored so that the formula can resemble
-            ax + by = d
-                1 = q - kp
-                1 = q + (-k)p
-            
-            following that n must be greater than m, n is filled with
-            q because q also must be greater or equal than p in this case.
-                1 = 1.n + (-k).m (first iteration)
-            """
-            affine_bezout_identity = {
-                'm': gcd_modulo_formula['p'],
-                'x': gcd_modulo_formula['k'],
-                'n': gcd_modulo_formula['q'],
-                'y': 1
-            }
-            if DEBUG: debug_msg(f'm_inverse_affine({m}, {n}), {len(gcd_modulo_formulas)} iteration left:', affine_bezout_identity)
-            continue
-
-        # multiply x with k, add the result to y
-        affine_bezout_identity['y'] += affine_bezout_identity['x'] * gcd_modulo_formula['k']
-
-        # update m with q
-        affine_bezout_identity['m'] = gcd_modulo_formula['q']
-
-        """
-        Swap mx and ny, as this function needs strict enforcing where
-        n must be greater than m.
-
-        As more backtracking is done, m in (-k)m will always get bigger.
-        """
-        affine_bezout_identity['m'], affine_bezout_identity['n'] = affine_bezout_identity['n'], affine_bezout_identity['m']
-        affine_bezout_identity['x'], affine_bezout_identity['y'] = affine_bezout_identity['y'], affine_bezout_identity['x']
-
-        if DEBUG: debug_msg(f'm_inverse_affine({m}, {n}), {len(gcd_modulo_formulas)} iteration left:', affine_bezout_identity)
-    
-
-    """
-    Thus, x is the modular inverse. But! If x is negative, it may cause
-    problems since, in affine, character (if using character) position is
-    indexed in positive value (e.g. 1 is a).
-    """
-    if affine_bezout_identity['x'] < 0:
-        affine_bezout_identity['x'] = n + affine_bezout_identity['x']
-
-    if DEBUG: debug_msg(f'm_inverse_affine({m}, {n}) =', affine_bezout_identity['x'])
-    return affine_bezout_identity['x']
-
-def decrypt_affine(m, n, b, C, is_m_inverse=False):
-    # P = m^-1 . (C - b) (mod n)
-
-    if is_m_inverse:
-        # if given m is supposedly the inverse of the actual m value
-        return (m * (C - b)) % n
-
-    return (m_inverse_affine(m, n) * (C - b)) % n
+from affine_core import DEBUG, MAX_BYTES, AffineException, debug_msg, decrypt_file, m_inverse_affine
 
 def analyze_known_plaintext(known_plaintext, known_ciphertext):
     """
-    known_plaintext and known ciphertext is a python list of a
-    bytearray, read from a related file.
+    known_plaintext and known ciphertext is a bytes (or any sequence
+    of byte values), read from a related file.
     related bytes (p => c) must be in order.
     """
 
@@ -176,11 +17,29 @@ def analyze_known_plaintext(known_plaintext, known_ciphertext):
 
     # *_p and *_c here means plaintext and ciphertext
 
-    first_eq_index = random.randint(0, len(known_plaintext) - 1)
-    first_p, first_c = known_plaintext.pop(first_eq_index), known_ciphertext.pop(first_eq_index)
+    """
+    Pick the pair whose p (first_p - second_p, see below) has the smallest
+    (p, n), so that situation 1 applies whenever it can ((p, n) = 1 means p
+    is odd, as n is a power of two). Because
+        p_i - p_j = (p_i - p_0) - (p_j - p_0)
+    can not have a smaller power of two dividing it than both p_i - p_0 and
+    p_j - p_0, pairing the first known byte with every other one finds it.
+    Equal bytes give p = 0, (p, n) = n, which is never picked over others.
+    """
+    n = MAX_BYTES + 1
+    first_eq_index, second_eq_index = 0, None
+    smallest_gcd = n
+    for i in range(1, len(known_plaintext)):
+        pair_gcd = gcd(known_plaintext[i] - known_plaintext[0], n)
+        if pair_gcd < smallest_gcd:
+            second_eq_index, smallest_gcd = i, pair_gcd
+            if smallest_gcd == 1: break
+
+    if second_eq_index == None:
+        raise AffineException("Every known plaintext byte is the same, m can not be found.", 8)
 
-    second_eq_index = random.randint(0, len(known_plaintext) - 1)
-    second_p, second_c = known_plaintext.pop(second_eq_index), known_ciphertext.pop(second_eq_index)
+    first_p, first_c = known_plaintext[first_eq_index], known_ciphertext[first_eq_index]
+    second_p, second_c = known_plaintext[second_eq_index], known_ciphertext[second_eq_index]
 
     # swap if first_p is smaller than second_p, may easier to debug due to consistency
     if first_p < second_p:
@@ -211,27 +70,22 @@ def analyze_known_plaintext(known_plaintext, known_ciphertext):
         2.2. If (p, n) divides c, divide p, n, and c with (p, n),
         then go back to 1.
     """
-    n = MAX_BYTES + 1
-    try:
+    d = gcd(p, n)
+    if d == 1:
         # Situation 1
-        p_inverse = m_inverse_affine(p, n)
+        # (p, n) = 1 is already known, so p^-1 exists
+        p_inverse = pow(p, -1, n)
         m = (c * p_inverse) % n
         if DEBUG: debug_msg(f'analyze_known_plaintext, situation 1 (p^-1, m): {p_inverse}, {m}')
-    except AffineException as ae:
-        if ae.code == 3:
-            # Situation 2
-            if c % ae.dump[-1]['p'] == 0:
-                # Situation 2.2
-                p_inverse = m_inverse_affine(
-                    p // ae.dump[-1]['p'],
-                    n // ae.dump[-1]['p']
-                )
-                m = ((c // ae.dump[-1]['p']) * p_inverse) % (n // ae.dump[-1]['p'])
-                if DEBUG: debug_msg(f'analyze_known_plaintext, situation 2.2 (p^-1, m): {p_inverse}, {m}')
-            else:
-                # Situation 2.1
-                if DEBUG: debug_msg('analyze_known_plaintext, situation 2.1 (p^-1, m): None, None')
-                raise AffineException("No solution exists from known plaintext.", 7)
+    elif c % d == 0:
+        # Situation 2.2
+        p_inverse = pow(p // d, -1, n // d)
+        m = ((c // d) * p_inverse) % (n // d)
+        if DEBUG: debug_msg(f'analyze_known_plaintext, situation 2.2 (p^-1, m): {p_inverse}, {m}')
+    else:
+        # Situation 2.1
+        if DEBUG: debug_msg('analyze_known_plaintext, situation 2.1 (p^-1, m): None, None')
+        raise AffineException("No solution exists from known plaintext.", 7)
 
     # m is found, now find b based on affine ciphertext equation
     b = (first_c - first_p * m) % n
@@ -244,10 +98,10 @@ def analyze_known_plaintext(known_plaintext, known_ciphertext):
 
 def analyze_affine(file_known_plaintext, file_known_ciphertext):
     with open(file_known_plaintext, 'rb') as f:
-        known_plaintext = list(f.read())
+        known_plaintext = f.read()
 
     with open(file_known_ciphertext, 'rb') as f:
-        known_ciphertext = list(f.read())
+        known_ciphertext = f.read()
 
     return analyze_known_plaintext(known_plaintext, known_ciphertext)
 
@@ -260,21 +114,6 @@ def decrypt_from_known_plaintext(file_ciphertext, file_known_plaintext, file_kno
 
     print(f'Affine cryptanalysis with known plaintext took {duration_attempt / 1000000000}s, with m={affine_parameters["m"]} and b={affine_parameters["b"]}')
 
-    with open(file_ciphertext, 'rb') as f:
-        ciphertext = f.read()
-
-    plaintext = bytearray()
-
-    for i in range(len(ciphertext)):
-        plaintext += bytearray([decrypt_affine(
-            affine_parameters['m^-1'],
-            MAX_BYTES + 1,
-            affine_parameters['b'],
-            ciphertext[i],
-            is_m_inverse=True
-        )])
-
-    with open(plaintext_decrypted_name, 'wb') as f:
-        f.write(plaintext)
+    decrypt_file(file_ciphertext, plaintext_decrypted_name, affine_parameters['m^-1'], affine_parameters['b'])
 
 decrypt_from_known_plaintext('affinecipher.jpeg', 'known_plaintext', 'known_ciphertext', 'dec.jpeg')